@@ -1,6 +1,5 @@
 #!/usr/bin/env python
 import os
-import subprocess
 import sys
 
 # Add the project root to the Python path
@@ -12,35 +11,27 @@ def main():
     # Print information
     print("Starting Daily Routine Dashboard...")
     print(f"Project root: {project_root}")
-    
-    # Get the virtual environment Python
-    venv_python = os.path.join(project_root, '.venv', 'bin', 'python')
-    
-    if not os.path.exists(venv_python):
-        print(f"Error: Virtual environment Python not found at {venv_python}")
-        print("Please ensure you've created and activated the virtual environment:")
-        print("  uv venv")
-        print("  source .venv/bin/activate")
-        print("  uv pip install -e .")
-        return
-    
+
     # Get the streamlit executable from the virtual environment
     venv_streamlit = os.path.join(project_root, '.venv', 'bin', 'streamlit')
-    
-    if not os.path.exists(venv_streamlit):
-        print(f"Error: Streamlit not found at {venv_streamlit}")
-        print("Please ensure streamlit is installed in the virtual environment:")
-        print("  uv pip install -e .")
-        return
-    
+    app_path = os.path.join(project_root, 'src', 'app.py')
+
     # Change to the script directory
     os.chdir(project_root)
-    
-    # Run streamlit from the virtual environment
-    app_path = os.path.join(project_root, 'src', 'app.py')
+
+    # Replace this process with streamlit instead of spawning and blocking
+    # on a second Python interpreter
     cmd = [venv_streamlit, "run", app_path]
     print(f"Running: {' '.join(cmd)}")
-    subprocess.run(cmd)
+    try:
+        os.execv(venv_streamlit, cmd)
+    except OSError:
+        print(f"Error: Streamlit not found at {venv_streamlit}")
+        print("Please ensure you've created the virtual environment and installed the project:")
+        print("  uv venv")
+        print("  source .venv/bin/activate")
+        print("  uv pip install -e .")
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
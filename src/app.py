@@ -6,13 +6,13 @@ import sys
 if __name__ == "__main__":
     sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-import pandas as pd
 import streamlit as st
 
-from src.config import DATE_COL, DEFAULT_DATE_RANGE, WAKE_UP_COL, WEIGHT_COL
-from src.data_processor import calculate_rolling_averages, calculate_sleep_duration, clean_data
-from src.google_sheets import fetch_data, get_data_range
-from src.visualization import create_dashboard_charts
+from src.config import DATE_COL, DEFAULT_DATE_RANGE, WEIGHT_COL
+
+# pandas, the Google Sheets client, and the plotting stack are imported
+# lazily inside the code paths that need them, so the credentials warning
+# page and cached reruns don't pay their import cost at cold start
 
 # Page configuration
 st.set_page_config(page_title="Daily Routine Dashboard", page_icon="📊", layout="wide")
@@ -28,22 +28,53 @@ st.markdown(
 st.sidebar.header("Controls")
 
 # Function to load and process data
+@st.cache_data(ttl=3600, show_spinner="Fetching data from Google Sheets...")
 def load_data():
-    with st.spinner("Fetching data from Google Sheets..."):
-        data = fetch_data()
-        if data.empty:
-            st.error("No data found or error connecting to Google Sheets. Please check your configuration.")
-            return None
-        
-        # Process the data
-        data = clean_data(data)
-        data = calculate_sleep_duration(data)
-        
-        # Calculate rolling averages for numeric columns
-        numeric_columns = data.select_dtypes(include=['number']).columns.tolist()
-        data = calculate_rolling_averages(data, numeric_columns)
-        
-        return data
+    from src.data_processor import calculate_rolling_averages, calculate_sleep_duration, clean_data
+    from src.google_sheets import fetch_data
+
+    data = fetch_data()
+    if data.empty:
+        return None
+
+    # Process the data
+    data = clean_data(data)
+    data = calculate_sleep_duration(data)
+
+    # Calculate rolling averages for numeric columns; the column selection
+    # happens once inside calculate_rolling_averages
+    data = calculate_rolling_averages(data)
+
+    return data
+
+# Chart construction is pure in the filtered frame, so identical reruns
+# (e.g. widget interactions that don't move the date slider) reuse the
+# already-built figures instead of rebuilding every Plotly chart
+@st.cache_data(ttl=3600)
+def build_charts(data):
+    from src.visualization import create_dashboard_charts
+
+    return create_dashboard_charts(data)
+
+# CSV serialization is cached so the download payload is built once per
+# filtered frame instead of on every rerender
+@st.cache_data(ttl=3600)
+def to_csv_bytes(data):
+    return data.to_csv(index=False).encode("utf-8")
+
+# Arrow conversion for the raw-data table is cached; with the Arrow-backed
+# string columns from clean_data this is close to a zero-copy view
+@st.cache_data(ttl=3600)
+def to_arrow_table(data):
+    import pyarrow as pa
+
+    return pa.Table.from_pandas(data, preserve_index=False)
+
+def format_minutes(minutes):
+    """Format minutes since midnight as a 12-hour clock label."""
+    hour, minute = divmod(int(minutes), 60)
+    period = "AM" if hour < 12 else "PM"
+    return f"{hour % 12 or 12}:{minute:02d} {period}"
 
 # Check if credentials exist
 creds_exist = os.path.exists(os.path.join(os.path.dirname(os.path.dirname(__file__)), 
@@ -63,6 +94,10 @@ if not creds_exist:
         """
     )
 else:
+    import numpy as np
+
+    from src.google_sheets import get_data_range
+
     # Load the data
     data = load_data()
     
@@ -86,7 +121,7 @@ else:
         st.sidebar.info(f"Total days recorded: {len(filtered_data)}")
         
         # Generate charts
-        charts = create_dashboard_charts(filtered_data)
+        charts = build_charts(filtered_data)
         
         # Sleep section
         st.header("Sleep Patterns")
@@ -94,17 +129,17 @@ else:
         # Create a row for the wake-up pattern chart
         if 'wake_up_pattern' in charts and charts['wake_up_pattern'] is not None:
             st.subheader("Wake-up Time Trends")
-            st.plotly_chart(charts['wake_up_pattern'], use_container_width=True)
+            st.plotly_chart(charts['wake_up_pattern'], use_container_width=True, theme=None)
         
         # Create a row for the sleep pattern chart
         if 'sleep_pattern' in charts and charts['sleep_pattern'] is not None:
             st.subheader("Sleep Time Trends")
-            st.plotly_chart(charts['sleep_pattern'], use_container_width=True)
+            st.plotly_chart(charts['sleep_pattern'], use_container_width=True, theme=None)
             
         # Create a row for sleep duration
         if 'sleep_duration' in charts and charts['sleep_duration'] is not None:
             st.subheader("Sleep Duration")
-            st.plotly_chart(charts['sleep_duration'], use_container_width=True)
+            st.plotly_chart(charts['sleep_duration'], use_container_width=True, theme=None)
         
         # Display sleep stats
         if 'sleep_stats' in charts and charts['sleep_stats'] is not None:
@@ -114,7 +149,7 @@ else:
         st.header("Weight Tracking")
         
         if 'weight_trend' in charts and charts['weight_trend'] is not None:
-            st.plotly_chart(charts['weight_trend'], use_container_width=True)
+            st.plotly_chart(charts['weight_trend'], use_container_width=True, theme=None)
         
         st.subheader("Weight Statistics")
         if filtered_data is not None and WEIGHT_COL in filtered_data.columns:
@@ -122,11 +157,15 @@ else:
             weight_df = filtered_data[filtered_data[WEIGHT_COL].notna()]
             
             if not weight_df.empty:
-                current_weight = weight_df.iloc[-1][WEIGHT_COL]
-                avg_weight = weight_df[WEIGHT_COL].mean()
-                min_weight = weight_df[WEIGHT_COL].min()
-                max_weight = weight_df[WEIGHT_COL].max()
-                
+                weights = weight_df[WEIGHT_COL]
+                # One aggregation pass over the column instead of separate
+                # mean/min/max scans; first/last are O(1) positional reads
+                stats = weights.agg(['mean', 'min', 'max'])
+                current_weight = weights.iloc[-1]
+                avg_weight = stats['mean']
+                min_weight = stats['min']
+                max_weight = stats['max']
+
                 col1, col2, col3, col4 = st.columns(4)
                 with col1:
                     st.metric("Current Weight", f"{current_weight}")
@@ -138,7 +177,7 @@ else:
                     st.metric("Max Weight", f"{max_weight}")
                 
                 # Calculate weight change over the period
-                first_weight = weight_df.iloc[0][WEIGHT_COL]
+                first_weight = weights.iloc[0]
                 weight_change = current_weight - first_weight
                 
                 st.metric("Weight Change Over Period", f"{weight_change}")
@@ -147,46 +186,68 @@ else:
         st.header("Daily Routine Overview")
         
         # Get stats for wake-up consistency
-        if WAKE_UP_COL in filtered_data.columns:
+        if 'wake_minutes' in filtered_data.columns:
             try:
-                # Convert wake-up times to datetime and extract hour
-                wake_times = pd.to_datetime(filtered_data[WAKE_UP_COL], 
-                                           format='%I:%M %p', 
-                                           errors='coerce')
-                wake_times = wake_times.dt.hour + wake_times.dt.minute / 60
-                
-                # Calculate consistency (standard deviation of wake-up times)
-                wake_consistency = wake_times.std()
-                
-                st.metric(
-                    "Wake-up Consistency",
-                    f"{wake_consistency:.2f} hours",
-                    help="Lower values indicate more consistent wake-up times"
-                )
-                
-                # Most common wake-up time
-                most_common_wake = filtered_data[WAKE_UP_COL].mode()[0] \
-                    if not filtered_data[WAKE_UP_COL].mode().empty else "N/A"
-                st.metric("Most Common Wake-up Time", most_common_wake)
-                
+                # Minutes since midnight, precomputed by clean_data, so no
+                # string re-parsing happens at render time
+                wake_minutes = filtered_data['wake_minutes'].dropna().to_numpy(dtype=np.int64)
+
+                if len(wake_minutes):
+                    # Calculate consistency (standard deviation of wake-up times)
+                    wake_consistency = wake_minutes.std() / 60
+
+                    st.metric(
+                        "Wake-up Consistency",
+                        f"{wake_consistency:.2f} hours",
+                        help="Lower values indicate more consistent wake-up times"
+                    )
+
+                    # Average and most common wake-up times from the same
+                    # minutes array; no further parsing needed
+                    st.metric("Average Wake-up Time", format_minutes(wake_minutes.mean()))
+
+                    most_common = int(np.bincount(wake_minutes).argmax())
+                    st.metric("Most Common Wake-up Time", format_minutes(most_common))
+                else:
+                    st.metric("Most Common Wake-up Time", "N/A")
+
             except Exception as e:
                 st.error(f"Error calculating wake-up stats: {e}")
-        
+
+        # Other numeric metrics (custom sheet columns), averaged in a single
+        # pass over the block instead of one scan per column
+        helper_cols = {WEIGHT_COL, 'Sleep Duration (hours)', 'wake_minutes',
+                       'wake_decimal', 'sleep_decimal'}
+        other_metrics = [
+            col for col in filtered_data.select_dtypes(include=['number']).columns
+            if col not in helper_cols and '-day avg)' not in col
+        ]
+        if other_metrics:
+            st.subheader("Other Metrics")
+            means = filtered_data[other_metrics].mean()
+            for i, (col, avg_val) in enumerate(means.items()):
+                if i % 3 == 0:
+                    cols = st.columns(3)
+                cols[i % 3].metric(f"Average {col}", f"{avg_val:.2f}")
+
         # Data section
         st.header("Raw Data")
-        st.dataframe(filtered_data)
+        # Opt-in rendering: st.tabs runs every tab's code on each rerun, so
+        # a checkbox is what actually skips the table serialization when the
+        # raw data isn't being looked at
+        if st.checkbox("Show raw data"):
+            st.dataframe(to_arrow_table(filtered_data), use_container_width=True)
         
         # Option to download data as CSV
         if not filtered_data.empty:
-            csv = filtered_data.to_csv(index=False)
             st.download_button(
                 label="Download data as CSV",
-                data=csv,
+                data=to_csv_bytes(filtered_data),
                 file_name="daily_routine_data.csv",
                 mime="text/csv",
             )
     else:
-        st.info("No data available. Please check your Google Sheets connection.")
+        st.error("No data found or error connecting to Google Sheets. Please check your configuration.")
 
 # Footer
 st.sidebar.markdown("---")
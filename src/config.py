@@ -1,9 +1,12 @@
 """ Config module """
+import logging
 import os
 from pathlib import Path
 
 from dotenv import load_dotenv
 
+logger = logging.getLogger(__name__)
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -13,16 +16,11 @@ BASE_DIR = Path(__file__).parent.parent
 # Google Sheets configuration
 SHEET_ID = os.getenv('GOOGLE_SHEET_ID')
 
-# Get range name and clean it up to remove any comments
-range_env = os.getenv('SHEET_RANGE', 'Sheet1!A:Z')
-if '#' in range_env:
-    RANGE_NAME = range_env.split('#')[0].strip()
-else:
-    RANGE_NAME = range_env
+# Range name, parsed once at import with any trailing comment stripped
+RANGE_NAME = os.getenv('SHEET_RANGE', 'Sheet1!A:Z').partition('#')[0].strip()
 
-# Print debug information
-print(f"DEBUG - SHEET_ID: {SHEET_ID}")
-print(f"DEBUG - RANGE_NAME: {RANGE_NAME}")
+logger.debug("SHEET_ID: %s", SHEET_ID)
+logger.debug("RANGE_NAME: %s", RANGE_NAME)
 
 # Credentials
 CREDENTIALS_PATH = BASE_DIR / 'credentials' / 'credentials.json'
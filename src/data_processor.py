@@ -1,91 +1,223 @@
+import operator
+
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
 
 from src.config import DATE_COL, WAKE_UP_COL, SLEEP_COL, WEIGHT_COL
 
+# Numba is an optional accelerator: when it is installed the rolling means
+# dispatch to pandas' numba engine and streaks use a compiled single-pass
+# scanner; otherwise everything falls back to the regular pandas paths.
+try:
+    from numba import njit
+    _HAS_NUMBA = True
+except ImportError:
+    _HAS_NUMBA = False
+
+_NUMBA_ENGINE_KWARGS = {'nopython': True, 'nogil': True, 'parallel': True}
+
+# Numeric helper columns derived by clean_data for stats and plotting;
+# they're representations of the time columns, not metrics, so rolling
+# averages skip them by default
+_TIME_HELPER_COLS = frozenset({'wake_minutes', 'wake_decimal', 'sleep_decimal'})
+
+# Pyarrow-backed string columns use a fraction of the memory of object
+# arrays and get vectorized string kernels; fall back to object dtype when
+# pyarrow is not installed.
+try:
+    import pyarrow  # noqa: F401
+    _HAS_PYARROW = True
+except ImportError:
+    _HAS_PYARROW = False
+
+if _HAS_NUMBA:
+    from numba.extending import register_jitable
+
+    @register_jitable
+    def _streak_step(run, met, day_gap):
+        """Advance a streak counter: reset on a miss or a skipped day."""
+        if not met:
+            return 0
+        if day_gap > 1:
+            return 1
+        return run + 1
+
+    # One compiled kernel per condition so the comparison is fused into the
+    # scan and no intermediate boolean array is materialized
+    @njit(cache=True)
+    def _streak_gt(arr, target, day_gap):
+        out = np.empty(len(arr), np.int64)
+        run = 0
+        for i in range(len(arr)):
+            run = _streak_step(run, arr[i] > target, day_gap[i])
+            out[i] = run
+        return out
+
+    @njit(cache=True)
+    def _streak_lt(arr, target, day_gap):
+        out = np.empty(len(arr), np.int64)
+        run = 0
+        for i in range(len(arr)):
+            run = _streak_step(run, arr[i] < target, day_gap[i])
+            out[i] = run
+        return out
+
+    @njit(cache=True)
+    def _streak_eq(arr, target, day_gap):
+        out = np.empty(len(arr), np.int64)
+        run = 0
+        for i in range(len(arr)):
+            run = _streak_step(run, arr[i] == target, day_gap[i])
+            out[i] = run
+        return out
+
+    @njit(cache=True)
+    def _streak_ne(arr, target, day_gap):
+        out = np.empty(len(arr), np.int64)
+        run = 0
+        for i in range(len(arr)):
+            run = _streak_step(run, arr[i] != target, day_gap[i])
+            out[i] = run
+        return out
+
+    @njit(cache=True)
+    def _streak_notna(arr, day_gap):
+        out = np.empty(len(arr), np.int64)
+        run = 0
+        for i in range(len(arr)):
+            run = _streak_step(run, not np.isnan(arr[i]), day_gap[i])
+            out[i] = run
+        return out
+
+    _NUMBA_STREAK_KERNELS = {
+        'greater_than': _streak_gt,
+        'less_than': _streak_lt,
+        'equal': _streak_eq,
+        'not_equal': _streak_ne,
+    }
+
 
 def clean_data(df):
-    """Clean and preprocess the data."""
+    """Clean and preprocess the data.
+
+    This is the entry point of the processing pipeline and makes the only
+    copy; the later stages add their columns to the same frame in place.
+    """
     if df.empty:
         return df
-    
+
     # Make a copy to avoid modifying the original dataframe
     df = df.copy()
     
-    # Store original string values for consistent display
+    # Keep the parsed times as datetime64 columns so downstream calculations
+    # stay vectorized; the original string columns are preserved for display
     if WAKE_UP_COL in df.columns:
-        # Convert time strings to datetime.time objects
-        df['wake_up_time'] = pd.to_datetime(df[WAKE_UP_COL], format='%I:%M %p', errors='coerce').dt.time
-        # Keep original string format for display consistency
-        df[WAKE_UP_COL] = df[WAKE_UP_COL]
-    
+        df['wake_up_time'] = pd.to_datetime(df[WAKE_UP_COL], format='%I:%M %p', errors='coerce')
+        # Canonical time-of-day as minutes since midnight for numeric stats
+        df['wake_minutes'] = (df['wake_up_time'].dt.hour * 60
+                              + df['wake_up_time'].dt.minute).astype('Int16')
+        # Decimal hours for the time-of-day plots, computed once here
+        df['wake_decimal'] = (df['wake_up_time'].dt.hour
+                              + df['wake_up_time'].dt.minute / 60).astype('float32')
+
     if SLEEP_COL in df.columns:
-        # For sleep time, convert to datetime.time objects
-        df['sleep_time'] = pd.to_datetime(df[SLEEP_COL], format='%I:%M %p', errors='coerce').dt.time
-        # Keep original string format for display consistency
-        df[SLEEP_COL] = df[SLEEP_COL]
+        df['sleep_time'] = pd.to_datetime(df[SLEEP_COL], format='%I:%M %p', errors='coerce')
+        df['sleep_decimal'] = (df['sleep_time'].dt.hour
+                               + df['sleep_time'].dt.minute / 60).astype('float32')
     
     # Convert weight to numeric
     if WEIGHT_COL in df.columns:
         df[WEIGHT_COL] = pd.to_numeric(df[WEIGHT_COL], errors='coerce')
-    
+
+    # Move the remaining raw string columns (the display copies of the time
+    # columns and any unparsed sheet columns) into Arrow buffers
+    if _HAS_PYARROW:
+        object_cols = df.columns[df.dtypes == object]
+        if len(object_cols):
+            df[object_cols] = df[object_cols].astype('string[pyarrow]')
+
     return df
 
 
 def calculate_sleep_duration(df):
-    """Calculate sleep duration between previous day's sleep time and current day's wake up time."""
+    """Calculate sleep duration between previous day's sleep time and current day's wake up time.
+
+    Modifies ``df`` in place and returns it; clean_data at the head of the
+    pipeline makes the only copy.
+    """
     if df.empty or 'sleep_time' not in df.columns or 'wake_up_time' not in df.columns:
         return df
-    
-    df = df.copy()
-    
+
     # Make sure data is sorted by date
     if DATE_COL in df.columns:
         df = df.sort_values(by=DATE_COL)
     
-    # Create a shifted column with previous day's sleep time
-    df['prev_day_sleep_time'] = df['sleep_time'].shift(1)
-    
-    # Function to calculate hours between previous day's sleep and current day's wake up
-    def calc_duration(prev_sleep, wake):
-        if pd.isna(prev_sleep) or pd.isna(wake):
-            return np.nan
-        
-        # Create datetime objects for calculation
-        sleep_dt = datetime.combine(datetime.today().date(), prev_sleep)
-        wake_dt = datetime.combine(datetime.today().date(), wake)
-        
-        # If wake time is earlier than sleep time (should be rare in this approach),
-        # we still handle it by adding a day to wake time
-        if wake_dt < sleep_dt:
-            wake_dt = wake_dt + timedelta(days=1)
-        
-        # Calculate duration in hours
-        duration = (wake_dt - sleep_dt).total_seconds() / 3600
-        return duration
-    
-    # Apply the calculation function
-    df['Sleep Duration (hours)'] = df.apply(
-        lambda row: calc_duration(row['prev_day_sleep_time'], row['wake_up_time']), axis=1)
-    
+    # Both columns are datetime64 anchored to the same date, so the previous
+    # day's sleep time can be subtracted from the wake-up time directly
+    prev_sleep = df['sleep_time'].shift(1)
+    wake = df['wake_up_time']
+
+    # Duration in hours; a negative difference means sleep was before
+    # midnight, so wrap around the 24-hour clock. NaT rows propagate as NaN.
+    # float32 is plenty of precision for hours and halves the column's
+    # footprint for the downstream rolling pass.
+    duration = (wake.values - prev_sleep.values) / np.timedelta64(1, 'h')
+    df['Sleep Duration (hours)'] = np.where(duration < 0, duration + 24,
+                                            duration).astype(np.float32)
+
     return df
 
 
-def calculate_rolling_averages(df, columns, window=7):
-    """Calculate rolling averages for specified columns."""
+def calculate_rolling_averages(df, columns=None, window=7):
+    """Calculate rolling averages for specified columns.
+
+    When ``columns`` is None all numeric columns are used; the selection
+    happens once here so callers don't need their own select_dtypes pass.
+    Modifies ``df`` in place and returns it; clean_data at the head of the
+    pipeline makes the only copy.
+    """
     if df.empty:
         return df
-    
-    df = df.copy()
-    
-    for col in columns:
-        if col in df.columns and pd.api.types.is_numeric_dtype(df[col]):
-            df[f'{col} ({window}-day avg)'] = df[col].rolling(window=window, min_periods=1).mean()
-    
+
+    if columns is None:
+        numeric_cols = [col for col in df.select_dtypes(include='number').columns
+                        if col not in _TIME_HELPER_COLS]
+    else:
+        numeric_cols = [col for col in columns
+                        if col in df.columns and pd.api.types.is_numeric_dtype(df[col])]
+
+    # method="table" rolls all columns through one numba kernel instead of a
+    # separate pass per column; it needs the numba engine and plain numpy
+    # dtypes, so extension arrays like Int16 stay on the per-column path
+    table_cols = [col for col in numeric_cols if isinstance(df[col].dtype, np.dtype)]
+    if _HAS_NUMBA and len(table_cols) > 1:
+        rolled = df[table_cols].rolling(window=window, min_periods=1, method='table').mean(
+            engine='numba', engine_kwargs=_NUMBA_ENGINE_KWARGS)
+        df[[f'{col} ({window}-day avg)' for col in table_cols]] = rolled.to_numpy()
+        remaining = [col for col in numeric_cols if col not in table_cols]
+    else:
+        remaining = numeric_cols
+
+    for col in remaining:
+        rolling = df[col].rolling(window=window, min_periods=1)
+        if _HAS_NUMBA and isinstance(df[col].dtype, np.dtype):
+            df[f'{col} ({window}-day avg)'] = rolling.mean(
+                engine='numba', engine_kwargs=_NUMBA_ENGINE_KWARGS)
+        else:
+            df[f'{col} ({window}-day avg)'] = rolling.mean()
+
     return df
 
 
+# Comparison operators for get_streaks conditions
+_STREAK_CONDITIONS = {
+    'greater_than': operator.gt,
+    'less_than': operator.lt,
+    'equal': operator.eq,
+    'not_equal': operator.ne,
+}
+
+
 def get_streaks(df, column, target_value=None, condition='greater_than'):
     """Calculate streaks for a specific metric.
     
@@ -96,40 +228,51 @@ def get_streaks(df, column, target_value=None, condition='greater_than'):
         condition: 'greater_than', 'less_than', 'equal', or 'not_equal'
     
     Returns:
-        DataFrame with streak information
+        DataFrame with streak information. The streak column is added to
+        ``df`` in place; clean_data at the head of the pipeline makes the
+        only copy.
     """
     if df.empty or column not in df.columns:
         return df
-    
-    df = df.copy()
-    
-    # Define the condition function
-    if condition == 'greater_than':
-        cond = lambda x: x > target_value
-    elif condition == 'less_than':
-        cond = lambda x: x < target_value
-    elif condition == 'equal':
-        cond = lambda x: x == target_value
-    elif condition == 'not_equal':
-        cond = lambda x: x != target_value
-    else:
+
+    if condition not in _STREAK_CONDITIONS:
         raise ValueError(f"Invalid condition: {condition}")
-    
-    # Create a boolean series
-    met_target = df[column].apply(cond) if target_value is not None else df[column].notna()
-    
-    # Calculate streaks
-    streak_id = (met_target != met_target.shift(1)).cumsum()
+
+    if DATE_COL in df.columns:
+        day_gap = df[DATE_COL].diff().dt.days.to_numpy(dtype='float64')
+    else:
+        day_gap = np.zeros(len(df))
+
+    # The specialized numba kernels fuse the comparison into the scan, so no
+    # intermediate boolean array is materialized; non-numeric columns and
+    # the no-numba case take the vectorized pandas path below
+    if (_HAS_NUMBA and isinstance(df[column].dtype, np.dtype)
+            and np.issubdtype(df[column].dtype, np.number)):
+        values = df[column].to_numpy(dtype=np.float64)
+        if target_value is not None:
+            df['current_streak'] = _NUMBA_STREAK_KERNELS[condition](
+                values, float(target_value), day_gap)
+        else:
+            df['current_streak'] = _streak_notna(values, day_gap)
+        return df
+
+    # Create a boolean series with a direct vector comparison. Arrow-backed
+    # and nullable columns compare into masked booleans whose NA semantics
+    # poison the shift/cumsum arithmetic below (and masked cumsum isn't
+    # supported at all), so materialize the mask as plain numpy with missing
+    # values counting as "condition not met"
+    if target_value is not None:
+        met_target = _STREAK_CONDITIONS[condition](df[column], target_value)
+        met_target = pd.Series(met_target.to_numpy(dtype=bool, na_value=False),
+                               index=df.index)
+    else:
+        met_target = df[column].notna()
+
+    # A streak resets whenever the condition flips or a calendar day is
+    # skipped, so both go into a single reset mask and the streaks are
+    # counted in one grouped cumulative sum
+    reset = (met_target != met_target.shift(1)) | (day_gap > 1)
+    streak_id = reset.cumsum()
     df['current_streak'] = met_target.groupby(streak_id).cumsum() * met_target
-    
-    # Reset streak to 0 for non-consecutive days
-    date_diff = df[DATE_COL].diff().dt.days
-    streak_breaks = (date_diff > 1) & (date_diff.notna())
-    if streak_breaks.any():
-        break_idx = df.index[streak_breaks]
-        for idx in break_idx:
-            streak_id_val = streak_id.iloc[idx]
-            df.loc[df.index >= idx, 'current_streak'] = met_target.loc[df.index >= idx].groupby(
-                streak_id.loc[df.index >= idx]).cumsum() * met_target.loc[df.index >= idx]
-    
+
     return df
@@ -1,5 +1,7 @@
+import functools
 import json
 import os
+import re
 import sys
 
 # Add parent directory to path if running as standalone script
@@ -15,17 +17,42 @@ from googleapiclient.errors import HttpError
 
 from src.config import CREDENTIALS_PATH, DATE_COL, RANGE_NAME, SHEET_ID, TOKEN_PATH
 
+__all__ = ['get_credentials', 'get_sheets_service', 'fetch_data', 'get_data_range']
+
 # If modifying these scopes, delete the token.json file.
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets.readonly']
 
+# Under Streamlit the service client is cached as a shared resource so the
+# OAuth handshake and API discovery only run once per process; outside
+# Streamlit an lru_cache provides the same memoization.
+try:
+    from streamlit import cache_resource as _cache_resource
+except ImportError:
+    _cache_resource = functools.lru_cache(maxsize=1)
+
+# Fetched sheet data changes at most daily, so cache it for an hour under
+# Streamlit; outside Streamlit the decorator is a no-op and standalone
+# scripts always hit the API fresh.
+try:
+    from streamlit import cache_data as _st_cache_data
+    _cache_fetched_data = _st_cache_data(ttl=3600)
+except ImportError:
+    def _cache_fetched_data(func):
+        return func
 
+
+@functools.lru_cache(maxsize=1)
 def get_credentials():
-    """Get valid user credentials from storage or initiate OAuth2 flow."""
+    """Get valid user credentials from storage or initiate OAuth2 flow.
+
+    The credentials are memoized for the process; see fetch_data for the
+    invalidation on authentication errors.
+    """
     creds = None
     if os.path.exists(TOKEN_PATH):
         try:
             with open(TOKEN_PATH, 'r', encoding='utf-8') as token_file:
-                token_data = json.loads(token_file.read())
+                token_data = json.load(token_file)
                 creds = Credentials.from_authorized_user_info(token_data, SCOPES)
         except (json.JSONDecodeError, ValueError, KeyError) as e:
             print(f"Error reading token file: {e}")
@@ -47,16 +74,63 @@ def get_credentials():
     return creds
 
 
+@_cache_resource
+def get_sheets_service():
+    """Build the authenticated Sheets API service client."""
+    creds = get_credentials()
+    # cache_discovery=False skips the discovery-document disk cache probe
+    return build('sheets', 'v4', credentials=creds, cache_discovery=False)
+
+
+def _looks_numeric(value):
+    """Return True if a raw cell value parses as a number."""
+    if value is None:
+        return False
+    try:
+        float(value)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def _build_dataframe(values) -> pd.DataFrame:
+    """Build a typed DataFrame from raw Sheets rows (header row first).
+
+    Sheets omits trailing empty cells, so short rows are padded to the
+    header width, and columns whose first non-empty cell looks numeric are
+    converted to float32 up front so downstream numeric ops never go
+    through object dtype.
+    """
+    headers = values[0]
+    width = len(headers)
+    rows = [row + [None] * (width - len(row)) if len(row) < width else row[:width]
+            for row in values[1:]]
+
+    data = {}
+    for i, header in enumerate(headers):
+        column = [row[i] for row in rows]
+        sample = next((v for v in column if v not in (None, '')), None)
+        if _looks_numeric(sample):
+            data[header] = pd.to_numeric(pd.Series(column), errors='coerce').astype('float32')
+        else:
+            data[header] = pd.Series(column, dtype=object)
+
+    return pd.DataFrame(data)
+
+
+@_cache_fetched_data
 def fetch_data() -> pd.DataFrame:
     """Fetch data from Google Sheet and return as DataFrame."""
     try:
-        creds = get_credentials()
-        service = build('sheets', 'v4', credentials=creds)
+        service = get_sheets_service()
 
         # Call the Sheets API
         sheet = service.spreadsheets()
+        # The fields mask drops the response envelope (range metadata,
+        # majorDimension, ...) so only the cell values come over the wire
         result = sheet.values().get(spreadsheetId=SHEET_ID,
-                                    range=RANGE_NAME).execute()
+                                    range=RANGE_NAME,
+                                    fields='values').execute()
         values = result.get('values', [])
 
         if not values:
@@ -64,22 +138,25 @@ def fetch_data() -> pd.DataFrame:
             return pd.DataFrame()
 
         # First row is headers
-        headers = values[0]
-        df = pd.DataFrame(values[1:], columns=headers)
-        
+        df = _build_dataframe(values)
+
+
         # Convert date strings to datetime objects
         if DATE_COL in df.columns:
-            try:
-                # Try with format YYYY/MM/DD
-                df[DATE_COL] = pd.to_datetime(df[DATE_COL], format='%Y/%m/%d')
-            except ValueError:
-                # If that fails, try with format MM/DD/YYYY
-                try:
-                    df[DATE_COL] = pd.to_datetime(df[DATE_COL], format='%m/%d/%Y')
-                except ValueError:
-                    # If both fail, try with a more flexible approach
-                    df[DATE_COL] = pd.to_datetime(df[DATE_COL], errors='coerce')
-                    
+            # Sniff the format from the first non-empty cell so the column
+            # parses in a single vectorized pass instead of a try/except
+            # cascade that can scan the whole column per failed format
+            sample = next((str(v) for v in df[DATE_COL] if v), '')
+            if re.match(r'^\d{4}/', sample):
+                fmt = '%Y/%m/%d'
+            elif re.match(r'^\d{1,2}/', sample):
+                fmt = '%m/%d/%Y'
+            else:
+                fmt = None  # fall back to flexible per-element parsing
+            df[DATE_COL] = pd.to_datetime(df[DATE_COL], format=fmt,
+                                          errors='coerce', cache=True)
+
+
             # Sort by date and remove rows with invalid dates
             df = df.dropna(subset=[DATE_COL])
             df = df.sort_values(by=DATE_COL)  # Sort by date
@@ -87,15 +164,29 @@ def fetch_data() -> pd.DataFrame:
 
     except HttpError as err:
         print(f"An error occurred: {err}")
+        if err.resp.status == 401:
+            # Drop the memoized credentials and service so the next call
+            # re-authenticates instead of replaying a stale token
+            get_credentials.cache_clear()
+            clear = getattr(get_sheets_service, 'clear', None) \
+                or getattr(get_sheets_service, 'cache_clear', None)
+            if clear is not None:
+                clear()
         return pd.DataFrame()
 
 
 def get_data_range(df: pd.DataFrame, days: int = 30) -> pd.DataFrame:
-    """Get data for the last specified number of days."""
+    """Get data for the last specified number of days.
+
+    Expects the frame sorted by date, which is how fetch_data returns it.
+    """
     if DATE_COL not in df.columns or df.empty:
         return df
-    
-    latest_date = df[DATE_COL].max()
-    start_date = latest_date - pd.Timedelta(days=days)
-    
-    return df[df[DATE_COL] >= start_date]
+
+    # The date column is sorted, so the cutoff row is found with a binary
+    # search and the tail taken as one positional slice instead of a full
+    # boolean-mask scan and copy
+    dates = df[DATE_COL]
+    start_date = dates.iloc[-1] - pd.Timedelta(days=days)
+
+    return df.iloc[dates.searchsorted(start_date):]
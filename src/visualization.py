@@ -1,32 +1,92 @@
 """ Visualization related code"""
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-import seaborn as sns
 
-from src.config import DATE_COL, SLEEP_COL, VIS_DATE_FORMAT, WAKE_UP_COL, WEIGHT_COL
+from src.config import DATE_COL, WEIGHT_COL
+
+# LOWESS for the weight trend line is optional; without statsmodels the
+# chart simply omits the smoothed trend and keeps the rolling average.
+try:
+    from statsmodels.nonparametric.smoothers_lowess import lowess as _lowess
+except ImportError:
+    _lowess = None
+
+# LOWESS is quadratic in the number of points, so the smoother runs on an
+# evenly-spaced subsample at most this long
+_LOWESS_MAX_POINTS = 200
+
+__all__ = [
+    'time_to_decimal', 'times_to_decimal', 'format_time_12hr',
+    'plot_time_series', 'plot_wake_up_pattern', 'plot_sleep_pattern',
+    'plot_sleep_duration', 'plot_weight_trend', 'plot_habit_calendar',
+    'plot_streak_chart', 'create_dashboard_charts',
+]
 
 
 def time_to_decimal(t):
-    """Convert datetime.time to decimal hours."""
+    """Convert a single datetime.time to decimal hours (scalar fallback)."""
     if pd.isna(t):
         return np.nan
     return t.hour + t.minute/60 + t.second/3600
 
 
-def plot_time_series(df, column, title, y_label, rolling_window=7, figsize=(12, 6)):
-    """Generate a time series plot for a given column."""
-    if df.empty or column not in df.columns:
+def times_to_decimal(series):
+    """Convert a time-of-day Series to decimal hours in one vectorized pass."""
+    if not pd.api.types.is_datetime64_any_dtype(series):
+        series = pd.to_datetime(series.astype(str), format='%H:%M:%S', errors='coerce')
+    return series.dt.hour + series.dt.minute/60 + series.dt.second/3600
+
+
+def format_time_12hr(decimal_hour):
+    """Convert decimal hours to a 12-hour clock label with AM/PM."""
+    hour = int(decimal_hour)
+    minute = int((decimal_hour % 1) * 60)
+    period = "AM" if hour < 12 else "PM"
+    # Convert to 12-hour format
+    hour_12 = hour % 12
+    if hour_12 == 0:
+        hour_12 = 12
+    return f"{hour_12}:{minute:02d} {period}"
+
+
+def _build_tick_labels(vals):
+    """Format an array of decimal hours as 12-hour labels in bulk."""
+    hours = vals.astype(int)
+    minutes = ((vals - hours) * 60).astype(int)
+    periods = np.where(hours < 12, 'AM', 'PM')
+    hours_12 = np.where(hours % 12 == 0, 12, hours % 12)
+    return tuple(f"{h}:{m:02d} {p}"
+                 for h, m, p in zip(hours_12.tolist(), minutes.tolist(), periods.tolist()))
+
+
+# Tick values and labels for 30-minute intervals over a 24-hour axis,
+# built once at import with array ops instead of on every plot call
+_HALF_HOUR_TICK_VALS = np.arange(49) * 0.5  # 0, 0.5, 1, ..., 24
+_HALF_HOUR_TICK_TEXTS = _build_tick_labels(_HALF_HOUR_TICK_VALS)
+
+
+def plot_time_series(df, column, title, y_label, rolling_window=7,
+                     rolling_avg=None, cols=None):
+    """Generate a time series plot for a given column.
+
+    Pass ``rolling_avg`` to reuse an already-computed rolling mean (the
+    processing pipeline produces one per numeric column); otherwise one is
+    computed here for numeric data. ``cols`` accepts a precomputed set of
+    column names so callers doing many guards share one membership test.
+    """
+    if df.empty or column not in (cols if cols is not None else df.columns):
         return None
-    
+
     fig = px.line(df, x=DATE_COL, y=column, title=title)
-    
+
     # Add rolling average if data is numeric
-    if pd.api.types.is_numeric_dtype(df[column]):
-        rolling_avg = df[column].rolling(window=rolling_window, min_periods=1).mean()
-        fig.add_scatter(x=df[DATE_COL], y=rolling_avg, mode='lines', 
+    if rolling_avg is None and pd.api.types.is_numeric_dtype(df[column]):
+        rolling_avg = df[column].astype('float32').rolling(
+            window=rolling_window, min_periods=1).mean()
+    if rolling_avg is not None:
+        fig.add_scatter(x=df[DATE_COL], y=rolling_avg, mode='lines',
                         name=f'{rolling_window}-day Average', line=dict(width=2, dash='dash'))
     
     fig.update_layout(
@@ -39,51 +99,40 @@ def plot_time_series(df, column, title, y_label, rolling_window=7, figsize=(12,
     return fig
 
 
-def plot_wake_up_pattern(df, figsize=(12, 6)):
-    """Plot wake up times on a 24-hour cycle."""
-    if df.empty or 'wake_up_time' not in df.columns:
+def _plot_time_of_day(df, time_col, decimal_col, title, trace_name, color, cols=None):
+    """Shared body for the wake-up and sleep time-of-day plots."""
+    if cols is None:
+        cols = df.columns
+    if df.empty or time_col not in cols:
         return None
-    
-    # Convert time objects to decimal hours for plotting
-    df = df.copy()
-    df['wake_decimal'] = df['wake_up_time'].apply(time_to_decimal)
-    
+
+    # clean_data precomputes the decimal-hours column as float32; fall back
+    # to converting here for frames that skipped the processing pipeline
+    if decimal_col in cols:
+        time_decimal = df[decimal_col]
+    else:
+        time_decimal = times_to_decimal(df[time_col])
+
     # Create figure
     fig = go.Figure()
-    
-    # Add wake up times
+
     fig.add_trace(go.Scatter(
-        x=df[DATE_COL], y=df['wake_decimal'],
+        x=df[DATE_COL], y=time_decimal,
         mode='lines+markers',
-        name='Wake Up Time',
-        line=dict(color='orange', width=2),
+        name=trace_name,
+        line=dict(color=color, width=2),
         marker=dict(size=8)
     ))
-    
-    # Helper function to convert decimal hours to 12-hour format with AM/PM
-    def format_time_12hr(decimal_hour):
-        hour = int(decimal_hour)
-        minute = int((decimal_hour % 1) * 60)
-        period = "AM" if hour < 12 else "PM"
-        # Convert to 12-hour format
-        hour_12 = hour % 12
-        if hour_12 == 0:
-            hour_12 = 12
-        return f"{hour_12}:{minute:02d} {period}"
-    
-    # Get tick values and labels for 30-minute intervals
-    tick_vals = [i/2 for i in range(0, 49)]  # 0, 0.5, 1, 1.5, ..., 24
-    tick_texts = [format_time_12hr(val) for val in tick_vals]
-    
+
     # Set y-axis to show time format
     fig.update_layout(
-        title='Wake Up Pattern',
+        title=title,
         xaxis_title='Date',
         yaxis_title='Time',
         yaxis=dict(
             tickmode='array',
-            tickvals=tick_vals,
-            ticktext=tick_texts,
+            tickvals=_HALF_HOUR_TICK_VALS,
+            ticktext=_HALF_HOUR_TICK_TEXTS,
             gridcolor='lightgray',
             minor_showgrid=True,
             autorange='reversed'  # This reverses the y-axis so earlier times are at the top
@@ -95,73 +144,25 @@ def plot_wake_up_pattern(df, figsize=(12, 6)):
         ),
         template='plotly_white'
     )
-    
+
     return fig
 
 
-def plot_sleep_pattern(df, figsize=(12, 6)):
+def plot_wake_up_pattern(df, cols=None):
+    """Plot wake up times on a 24-hour cycle."""
+    return _plot_time_of_day(df, 'wake_up_time', 'wake_decimal',
+                             'Wake Up Pattern', 'Wake Up Time', 'orange', cols=cols)
+
+
+def plot_sleep_pattern(df, cols=None):
     """Plot sleep times on a 24-hour cycle."""
-    if df.empty or 'sleep_time' not in df.columns:
-        return None
-    
-    # Convert time objects to decimal hours for plotting
-    df = df.copy()
-    df['sleep_decimal'] = df['sleep_time'].apply(time_to_decimal)
-    
-    # Create figure
-    fig = go.Figure()
-    
-    # Add sleep times
-    fig.add_trace(go.Scatter(
-        x=df[DATE_COL], y=df['sleep_decimal'],
-        mode='lines+markers',
-        name='Sleep Time',
-        line=dict(color='blue', width=2),
-        marker=dict(size=8)
-    ))
-    
-    # Helper function to convert decimal hours to 12-hour format with AM/PM
-    def format_time_12hr(decimal_hour):
-        hour = int(decimal_hour)
-        minute = int((decimal_hour % 1) * 60)
-        period = "AM" if hour < 12 else "PM"
-        # Convert to 12-hour format
-        hour_12 = hour % 12
-        if hour_12 == 0:
-            hour_12 = 12
-        return f"{hour_12}:{minute:02d} {period}"
-    
-    # Get tick values and labels for 30-minute intervals
-    tick_vals = [i/2 for i in range(0, 49)]  # 0, 0.5, 1, 1.5, ..., 24
-    tick_texts = [format_time_12hr(val) for val in tick_vals]
-    
-    # Set y-axis to show time format
-    fig.update_layout(
-        title='Sleep Pattern',
-        xaxis_title='Date',
-        yaxis_title='Time',
-        yaxis=dict(
-            tickmode='array',
-            tickvals=tick_vals,
-            ticktext=tick_texts,
-            gridcolor='lightgray',
-            minor_showgrid=True,
-            autorange='reversed'  # This reverses the y-axis so earlier times are at the top
-        ),
-        xaxis=dict(
-            type='date',
-            tickformat='%b %d\n%Y',  # Format: May 01, 2025
-            dtick='D1'  # Show one tick per day
-        ),
-        template='plotly_white'
-    )
-    
-    return fig
+    return _plot_time_of_day(df, 'sleep_time', 'sleep_decimal',
+                             'Sleep Pattern', 'Sleep Time', 'blue', cols=cols)
 
 
-def plot_sleep_duration(df, figsize=(12, 6)):
+def plot_sleep_duration(df, cols=None):
     """Plot sleep duration over time."""
-    if df.empty or 'Sleep Duration (hours)' not in df.columns:
+    if df.empty or 'Sleep Duration (hours)' not in (cols if cols is not None else df.columns):
         return None
     
     fig = px.bar(
@@ -202,22 +203,41 @@ def plot_sleep_duration(df, figsize=(12, 6)):
     return fig
 
 
-def plot_weight_trend(df, figsize=(12, 6)):
-    """Plot weight trend over time."""
-    if df.empty or WEIGHT_COL not in df.columns:
+def plot_weight_trend(df, rolling_avg=None, cols=None):
+    """Plot weight trend over time.
+
+    Pass ``rolling_avg`` to reuse an already-computed rolling mean instead
+    of re-rolling the weight column here.
+    """
+    if df.empty or WEIGHT_COL not in (cols if cols is not None else df.columns):
         return None
-    
+
     # Create the figure
     fig = px.scatter(
         df, x=DATE_COL, y=WEIGHT_COL,
-        trendline='lowess',  # Add a trend line
         title='Weight Trend Over Time',
         labels={WEIGHT_COL: 'Weight (kg/lbs)'},
     )
-    
+
+    # Trend line computed once with a single non-iterative LOWESS pass over
+    # a bounded subsample, instead of px's trendline='lowess' which smooths
+    # every point at the default wide fraction
+    if _lowess is not None:
+        weights = df[WEIGHT_COL].to_numpy(dtype=np.float64)
+        valid = np.flatnonzero(~np.isnan(weights))
+        if len(valid) >= 3:
+            if len(valid) > _LOWESS_MAX_POINTS:
+                valid = valid[np.linspace(0, len(valid) - 1,
+                                          _LOWESS_MAX_POINTS).astype(np.intp)]
+            trend = _lowess(weights[valid], valid.astype(np.float64),
+                            frac=0.3, it=0, return_sorted=False)
+            fig.add_scatter(x=df[DATE_COL].iloc[valid], y=trend, mode='lines',
+                            name='Trend', line=dict(width=2, dash='dot'))
+
     # Add 7-day moving average
-    rolling_avg = df[WEIGHT_COL].rolling(window=7, min_periods=1).mean()
-    fig.add_scatter(x=df[DATE_COL], y=rolling_avg, mode='lines', 
+    if rolling_avg is None:
+        rolling_avg = df[WEIGHT_COL].astype('float32').rolling(window=7, min_periods=1).mean()
+    fig.add_scatter(x=df[DATE_COL], y=rolling_avg, mode='lines',
                     name='7-day Average', line=dict(width=2, color='green'))
     
     fig.update_layout(
@@ -237,27 +257,34 @@ def plot_habit_calendar(df, column, title, colorscale='YlGn'):
     if df.empty or column not in df.columns:
         return None
     
-    # Prepare data for calendar heatmap
-    df = df.copy()
-    df['year'] = df[DATE_COL].dt.year
-    df['month'] = df[DATE_COL].dt.month
-    df['day'] = df[DATE_COL].dt.day
-    df['weekday'] = df[DATE_COL].dt.weekday
-    
-    # Convert column to numeric if it's not already
-    if not pd.api.types.is_numeric_dtype(df[column]):
-        df[column] = df[column].astype(bool).astype(int)
-    
-    # Create calendar data
+    # Convert column to numeric if it's not already. Sheets returns
+    # checkbox cells as 'TRUE'/'FALSE' strings, which are both truthy, so
+    # map them explicitly; int8 is plenty for 0/1 flags.
+    values = df[column]
+    if not pd.api.types.is_numeric_dtype(values):
+        values = pd.to_numeric(values.replace({'TRUE': 1, 'FALSE': 0}),
+                               errors='coerce').fillna(0).astype('int8')
+
+    # Only the three derived columns feed the heatmap, so build a narrow
+    # frame from them instead of copying the caller's whole frame
+    calendar = pd.DataFrame({
+        'day': df[DATE_COL].dt.day.values,
+        # Categorical over all seven weekdays so the grid keeps a row for
+        # every weekday even when the window doesn't cover them all,
+        # matching the fixed y-axis labels below
+        'weekday': pd.Categorical(df[DATE_COL].dt.weekday.values,
+                                  categories=range(7), ordered=True),
+        column: values.values,
+    })
+
+    # Create calendar data: a two-key mean on the Cython groupby fast path,
+    # unstacked into the weekday-by-day grid. Only the group keys get
+    # sorted, never the N input rows.
+    pivot = calendar.groupby(['weekday', 'day'], observed=False)[column].mean().unstack('day')
     fig = px.imshow(
-        df.pivot_table(
-            index='weekday', 
-            columns='day', 
-            values=column,
-            aggfunc='mean'
-        ),
+        pivot,
         labels=dict(x="Day of Month", y="Day of Week", color=column),
-        x=sorted(df['day'].unique()),
+        x=pivot.columns.tolist(),
         y=['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'],
         color_continuous_scale=colorscale,
         title=title
@@ -308,21 +335,28 @@ def create_dashboard_charts(df):
         return {}
     
     charts = {}
-    
+
+    # One hashed set for all the column guards here and inside the plot
+    # functions, instead of probing the Index per check
+    cols = frozenset(df.columns)
+
     # Sleep metrics
-    if 'sleep_time' in df.columns and 'wake_up_time' in df.columns:
-        charts['sleep_pattern'] = plot_sleep_pattern(df)
-        charts['wake_up_pattern'] = plot_wake_up_pattern(df)
-        
-        if 'Sleep Duration (hours)' in df.columns:
-            charts['sleep_duration'] = plot_sleep_duration(df)
-            
-            # Sleep duration time series
+    if 'sleep_time' in cols and 'wake_up_time' in cols:
+        charts['sleep_pattern'] = plot_sleep_pattern(df, cols=cols)
+        charts['wake_up_pattern'] = plot_wake_up_pattern(df, cols=cols)
+
+        if 'Sleep Duration (hours)' in cols:
+            charts['sleep_duration'] = plot_sleep_duration(df, cols=cols)
+
+            # Sleep duration time series, reusing the rolling average the
+            # processing pipeline already computed when it's present
             charts['sleep_duration_trend'] = plot_time_series(
-                df, 'Sleep Duration (hours)', 'Sleep Duration Trend', 'Hours of Sleep')
-    
+                df, 'Sleep Duration (hours)', 'Sleep Duration Trend', 'Hours of Sleep',
+                rolling_avg=df.get('Sleep Duration (hours) (7-day avg)'), cols=cols)
+
     # Weight trend
-    if WEIGHT_COL in df.columns:
-        charts['weight_trend'] = plot_weight_trend(df)
+    if WEIGHT_COL in cols:
+        charts['weight_trend'] = plot_weight_trend(
+            df, rolling_avg=df.get(f'{WEIGHT_COL} (7-day avg)'), cols=cols)
     
     return charts